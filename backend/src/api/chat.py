@@ -2,8 +2,10 @@
 Chat API endpoints for psychological advisor.
 """
 
-from typing import Optional
+from typing import Any, Dict, Optional
+import orjson
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from ..utils.session_manager import SessionManager, ConversationSession
@@ -11,17 +13,6 @@ from ..utils.llm_handler import PsychologicalAdvisorLLM
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-# Global LLM instance (lazy initialization)
-llm_handler = None
-
-def get_llm_handler():
-    """Get or create LLM handler instance."""
-    global llm_handler
-    if llm_handler is None:
-        llm_handler = PsychologicalAdvisorLLM()
-    return llm_handler
-
-
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., min_length=1, max_length=1000, description="User message")
@@ -39,10 +30,16 @@ def get_session_manager(request: Request) -> SessionManager:
     return request.app.state.session_manager
 
 
-@router.post("/message", response_model=ChatResponse)
+def get_llm_handler(request: Request) -> PsychologicalAdvisorLLM:
+    """Dependency to get shared LLM handler from app state."""
+    return request.app.state.llm
+
+
+@router.post("/message", response_class=ORJSONResponse, response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
-    session_manager: SessionManager = Depends(get_session_manager)
+    session_manager: SessionManager = Depends(get_session_manager),
+    llm: PsychologicalAdvisorLLM = Depends(get_llm_handler)
 ) -> ChatResponse:
     """
     Send message to psychological advisor and get response.
@@ -57,22 +54,15 @@ async def send_message(
         # Add user message to session
         session.add_message("user", chat_request.message)
         
-        # Get conversation history for context
-        conversation_history = session.get_conversation_history()
-        
-        # Get LLM response with context
-        llm = get_llm_handler()
+        # Get LLM response with session context
         assistant_response = await llm.get_response(
             user_message=chat_request.message,
-            conversation_history=conversation_history
+            session=session
         )
         
         # Add assistant response to session
         session.add_message("assistant", assistant_response)
         
-        # Clean up expired sessions periodically
-        session_manager.cleanup_expired_sessions()
-        
         return ChatResponse(
             response=assistant_response,
             session_id=session.session_id
@@ -85,6 +75,56 @@ async def send_message(
         )
 
 
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Format payload as server-sent event."""
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
+
+@router.post("/message/stream")
+async def stream_message(
+    chat_request: ChatRequest,
+    session_manager: SessionManager = Depends(get_session_manager),
+    llm: PsychologicalAdvisorLLM = Depends(get_llm_handler)
+) -> StreamingResponse:
+    """
+    Send message to psychological advisor and stream response as SSE.
+    
+    First event carries the session ID, then {"delta": ...} events follow as
+    text is generated. A {"replace": ...} event means the safety filter replaced
+    the reply and the client should show that text instead.
+    """
+    
+    session = session_manager.get_or_create_session(chat_request.session_id)
+    session.add_message("user", chat_request.message)
+    
+    async def event_stream():
+        response_parts = []
+        completed = False
+        try:
+            yield _sse_event({"session_id": session.session_id})
+            async for event in llm.stream_response(
+                user_message=chat_request.message,
+                session=session
+            ):
+                if "replace" in event:
+                    response_parts = [event["replace"]]
+                else:
+                    response_parts.append(event["delta"])
+                yield _sse_event(event)
+            completed = True
+        finally:
+            # Store response even if client disconnected mid-stream
+            response_text = "".join(response_parts)
+            if response_text and not completed:
+                # Partial text never reached the final safety filter
+                response_text = llm.filter_partial_response(response_text)
+            # Nothing was generated, so there is no assistant turn to keep
+            if response_text:
+                session.add_message("assistant", response_text)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/session/{session_id}/history")
 async def get_conversation_history(
     session_id: str,
@@ -2,16 +2,19 @@
 FastAPI app for psychological advisor chatbot with Gemini LLM and NeMo Guardrails.
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from typing import Dict, List
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 
 from .api.chat import router as chat_router
 from .utils.session_manager import SessionManager
+from .utils.llm_handler import PsychologicalAdvisorLLM
 
 # Load env vars from backend directory
 import pathlib
@@ -19,16 +22,38 @@ backend_dir = pathlib.Path(__file__).parent.parent
 load_dotenv(backend_dir / ".env")
 
 
+SESSION_CLEANUP_INTERVAL_SECONDS = 30
+
+
+async def _expire_sessions_periodically(session_manager: SessionManager):
+    """Background loop removing expired sessions off the request path."""
+    while True:
+        await asyncio.sleep(SESSION_CLEANUP_INTERVAL_SECONDS)
+        session_manager.cleanup_expired_sessions()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan mgmt for FastAPI app - init/cleanup resources."""
     # Startup: init session manager
     app.state.session_manager = SessionManager()
     
+    # Init single LLM handler so its Gemini client is reused for app lifetime
+    app.state.llm = PsychologicalAdvisorLLM()
+    
+    # Expire sessions in background instead of on every message
+    cleanup_task = asyncio.create_task(
+        _expire_sessions_periodically(app.state.session_manager)
+    )
+    
     yield
     
-    # Shutdown: cleanup if needed
-    pass
+    # Shutdown: stop background session cleanup
+    cleanup_task.cancel()
+    try:
+        await cleanup_task
+    except asyncio.CancelledError:
+        pass
 
 
 # Create FastAPI app with lifespan mgmt
@@ -36,7 +61,8 @@ app = FastAPI(
     title="Psychological Advisor API",
     description="AI-powered psychological advisor with safety guardrails",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for frontend integration
@@ -4,14 +4,13 @@ NeMo Guardrails configuration for psychological advisor safety.
 
 import os
 import yaml
+from functools import lru_cache
 from nemoguardrails import LLMRails, RailsConfig
 from typing import Dict, Any
 
 
-def create_guardrails_config() -> str:
-    """Create enhanced NeMo Guardrails config for psychological advisor with wellness recommendations."""
-    
-    yaml_config = """
+# Enhanced config for psychological advisor with wellness recommendations
+_YAML_CONFIG = """
 models:
   - type: main
     engine: google-generative-ai
@@ -37,13 +36,17 @@ sample_conversation: |
   
   user: I can't sleep well and feel anxious
   bot: Sleep difficulties and anxiety often go hand in hand, and I'm sorry you're experiencing this. Creating a calming bedtime routine might help - try putting away screens an hour before bed and doing something relaxing like gentle stretching or reading. What time do you usually try to fall asleep, and what's typically on your mind when you're lying there?
-"""
-    
-    return yaml_config.strip()
+""".strip()
+
+
+def create_guardrails_config() -> str:
+    """Create enhanced NeMo Guardrails config for psychological advisor with wellness recommendations."""
+    return _YAML_CONFIG
 
 
+@lru_cache(maxsize=1)
 def create_rails_instance() -> LLMRails:
-    """Create and configure NeMo Guardrails instance."""
+    """Create and configure NeMo Guardrails instance (built once per process)."""
     yaml_content = create_guardrails_config()
     
     rails_config = RailsConfig.from_content(
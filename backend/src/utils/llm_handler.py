@@ -2,12 +2,78 @@
 LLM handler for Gemini integration with direct Google Generative AI and guardrails.
 """
 
+import asyncio
+import hashlib
 import os
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Dict, Final, List, Optional, Tuple
 import google.generativeai as genai
+from cachetools import TTLCache
 from nemoguardrails import LLMRails
 
 from .guardrails_config import create_rails_instance
+from .session_manager import ConversationSession
+
+
+# Enhanced list of concerning keywords for crisis detection
+CRISIS_KEYWORDS: Final[Tuple[str, ...]] = (
+    "kill yourself", "suicide", "self-harm", "end it all", 
+    "not worth living", "hurt yourself", "overdose", "want to die",
+    "end my life", "harm myself", "cut myself", "better off dead"
+)
+
+# Medical/diagnostic keywords that should be avoided
+MEDICAL_KEYWORDS: Final[Tuple[str, ...]] = (
+    "diagnose", "you have", "disorder", "disease", "medication",
+    "prescribe", "medical condition", "illness"
+)
+
+# Off-topic keywords
+OFF_TOPIC_KEYWORDS: Final[Tuple[str, ...]] = (
+    "weather", "sports", "cooking", "homework", "math", "science",
+    "programming", "technology", "politics", "news"
+)
+
+# Keywords indicating a psychology-focused response
+PSYCHOLOGY_KEYWORDS: Final[Tuple[str, ...]] = (
+    "feel", "emotion", "stress", "anxiety", "support", "coping", 
+    "mental health", "wellbeing", "thoughts", "mood", "therapy",
+    "counseling", "mindfulness", "self-care", "relationship"
+)
+
+
+# Longest crisis keyword, used to re-scan chunk boundaries while streaming
+_CRISIS_MAX_LEN = max(map(len, CRISIS_KEYWORDS))
+
+# Responses longer than this are filtered on a worker thread. The keyword scan
+# holds the GIL, so to_thread only lets the loop time-slice with it rather than
+# run in parallel; it pays off only once inline filtering blocks for ~1 ms, far
+# above the ~4-5K chars a 1000-token reply reaches
+_OFFLOAD_FILTER_MIN_CHARS = 65536
+
+# Canned responses, built once at import
+_FALLBACK_RESPONSE: Final[str] = ("I apologize, but I'm having trouble processing your message right now. "
+                                  "How are you feeling at the moment? I'm here to listen and support you.")
+
+_CRISIS_RESPONSE: Final[str] = ("I'm very concerned about what you're sharing. Your life has value and there are people who want to help. "
+                                "Please reach out immediately to:\n"
+                                "• Crisis Text Line: Text HOME to 741741\n"
+                                "• National Suicide Prevention Lifeline: 988\n"
+                                "• Emergency Services: 911\n\n"
+                                "I'm here to support you emotionally, but please connect with professional crisis support right now. "
+                                "What immediate steps can we take to help you feel safer?")
+
+_MEDICAL_RESPONSE: Final[str] = ("I want to be helpful, but I can't provide medical advice or diagnoses. "
+                                 "For medical concerns, please consult with a healthcare professional. "
+                                 "I'm here to provide emotional support and help you process your feelings. "
+                                 "How are you feeling emotionally about the situation you're facing?")
+
+_OFF_TOPIC_RESPONSE: Final[str] = ("I'm here to provide psychological support and guidance. "
+                                   "While I can't help with that topic, I'd be happy to talk about any emotions or stress "
+                                   "you might be experiencing. What's on your mind regarding your emotional wellbeing?")
+
+_OFF_FOCUS_RESPONSE: Final[str] = ("I'm here to provide psychological support and emotional guidance. "
+                                   "Let's focus on your thoughts, feelings, and emotional wellbeing. "
+                                   "What would you like to explore about how you're feeling?")
 
 
 class PsychologicalAdvisorLLM:
@@ -22,6 +88,29 @@ class PsychologicalAdvisorLLM:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
         
+        # Generation settings never change, so build config once
+        self._gen_config = genai.types.GenerationConfig(
+            temperature=0.7,
+            max_output_tokens=1000,
+        )
+        
+        # Bound concurrent upstream calls to stay within provider limits
+        max_inflight_env = os.getenv("LLM_MAX_INFLIGHT", "32")
+        try:
+            max_inflight = int(max_inflight_env)
+        except ValueError:
+            max_inflight = 0
+        if max_inflight < 1:
+            raise ValueError(
+                f"LLM_MAX_INFLIGHT must be a positive integer, got {max_inflight_env!r}"
+            )
+        self._inflight = asyncio.Semaphore(max_inflight)
+        
+        # Optional cache of filtered responses for repeated identical prompts
+        self._resp_cache: Optional[TTLCache] = None
+        if os.getenv("RESPONSE_CACHE") == "1":
+            self._resp_cache = TTLCache(maxsize=1024, ttl=300)
+        
         # Use enhanced safety filtering
         self.rails = None
         self.use_guardrails = False
@@ -62,109 +151,156 @@ IMPORTANT SAFETY RULES:
 - Be encouraging and help users find hope and positive perspectives
 
 Remember: You are here to listen, support, ask questions, AND provide helpful wellness guidance - not to replace professional mental health treatment."""
+        
+        # Stable prompt prefix shared by every request (eligible for upstream prefix caching)
+        self._system_prefix = self.system_prompt + "\n\n"
+    
+    def _build_prompt(
+        self, 
+        user_message: str, 
+        session: Optional[ConversationSession] = None
+    ) -> str:
+        """Build full prompt from system prompt, session history and user message."""
+        # Pre-rendered conversation history if available
+        history = session.get_prompt_context(10) if session else ""  # Last 10 messages for context
+        
+        # Build full prompt with current user message in one pass
+        return "".join((self._system_prefix, history, "Human: ", user_message, "\nAssistant:"))
     
     async def get_response(
         self, 
         user_message: str, 
-        conversation_history: List[Dict[str, str]] = None
+        session: Optional[ConversationSession] = None
     ) -> str:
         """Get LLM response with guardrails and conversation context."""
         
+        full_prompt = self._build_prompt(user_message, session)
+        
+        # Serve repeated identical prompts from cache if enabled
+        cache_key = None
+        if self._resp_cache is not None:
+            cache_key = hashlib.blake2b(full_prompt.encode(), digest_size=16).hexdigest()
+            cached_response = self._resp_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+        
+        # Fall back to a supportive message if the Gemini call fails
         try:
-            # Build conversation context
-            full_prompt = self.system_prompt + "\n\n"
-            
-            # Add conversation history if available
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Last 10 messages for context
-                    role = "Human" if msg["role"] == "user" else "Assistant"
-                    full_prompt += f"{role}: {msg['content']}\n"
-            
-            # Add current user message
-            full_prompt += f"Human: {user_message}\nAssistant:"
-            
-            # Get response from Gemini with safety filtering
-            response = await self.model.generate_content_async(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
+            async with self._inflight:
+                response = await self.model.generate_content_async(
+                    full_prompt,
+                    generation_config=self._gen_config
                 )
-            )
             response_text = response.text
-            response_text = self._apply_safety_filter(response_text)
-            
-            return response_text
-            
-        except Exception as e:
-            return ("I apologize, but I'm having trouble processing your message right now. "
-                   "How are you feeling at the moment? I'm here to listen and support you.")
+        except Exception:
+            return _FALLBACK_RESPONSE
+        
+        # Apply safety filtering
+        response_text = await self._filter_response(response_text)
+        
+        if self._resp_cache is not None and cache_key is not None:
+            self._resp_cache[cache_key] = response_text
+        
+        return response_text
+    
+    async def get_responses_batch(
+        self, 
+        items: List[Tuple[str, Optional[ConversationSession]]]
+    ) -> List[str]:
+        """Get LLM responses for several (user message, session) pairs concurrently.
+        
+        Calls run in parallel up to the shared LLM_MAX_INFLIGHT limit.
+        """
+        return await asyncio.gather(*(
+            self.get_response(user_message, session) for user_message, session in items
+        ))
+    
+    async def stream_response(
+        self, 
+        user_message: str, 
+        session: Optional[ConversationSession] = None
+    ) -> AsyncIterator[Dict[str, str]]:
+        """Stream LLM response as it is generated, with safety filtering.
+        
+        Yields {"delta": text} events for each generated chunk. If the reply has
+        to be filtered, a final {"replace": text} event carries the full text the
+        client should show instead.
+        """
+        full_prompt = self._build_prompt(user_message, session)
+        response_text = ""
+        
+        try:
+            async with self._inflight:
+                response = await self.model.generate_content_async(
+                    full_prompt,
+                    generation_config=self._gen_config,
+                    stream=True
+                )
+                async for chunk in response:
+                    # Re-scan tail of previous text so split keywords are caught
+                    scan_start = max(0, len(response_text) - _CRISIS_MAX_LEN)
+                    response_text += chunk.text
+                    window_lower = response_text[scan_start:].lower()
+                    
+                    # Abort early on crisis content
+                    if any(keyword in window_lower for keyword in CRISIS_KEYWORDS):
+                        yield {"replace": _CRISIS_RESPONSE}
+                        return
+                    
+                    yield {"delta": chunk.text}
+        except Exception:
+            yield {"replace": _FALLBACK_RESPONSE}
+            return
+        
+        # Remaining checks need the complete response
+        filtered_text = await self._filter_response(response_text)
+        if filtered_text != response_text:
+            yield {"replace": filtered_text}
+    
+    async def _filter_response(self, response: str) -> str:
+        """Apply safety filter, off the event loop only for long responses."""
+        if len(response) > _OFFLOAD_FILTER_MIN_CHARS:
+            return await asyncio.to_thread(self._apply_safety_filter, response)
+        return self._apply_safety_filter(response)
+    
+    def filter_partial_response(self, response: str) -> str:
+        """Apply crisis and medical checks to a reply cut off mid-stream.
+        
+        Off-topic and psychology-focus checks need the complete reply, so a
+        truncated fragment is only screened for harmful content.
+        """
+        response_lower = response.lower()
+        
+        # Crisis intervention check
+        if any(keyword in response_lower for keyword in CRISIS_KEYWORDS):
+            return _CRISIS_RESPONSE
+        
+        # Medical advice check
+        if any(keyword in response_lower for keyword in MEDICAL_KEYWORDS):
+            return _MEDICAL_RESPONSE
+        
+        return response
     
     def _apply_safety_filter(self, response: str) -> str:
         """Apply enhanced safety filtering for psychological advisor responses."""
         
-        # Enhanced list of concerning keywords for crisis detection
-        crisis_keywords = [
-            "kill yourself", "suicide", "self-harm", "end it all", 
-            "not worth living", "hurt yourself", "overdose", "want to die",
-            "end my life", "harm myself", "cut myself", "better off dead"
-        ]
-        
-        # Medical/diagnostic keywords that should be avoided
-        medical_keywords = [
-            "diagnose", "you have", "disorder", "disease", "medication",
-            "prescribe", "medical condition", "illness"
-        ]
-        
-        # Off-topic keywords
-        off_topic_keywords = [
-            "weather", "sports", "cooking", "homework", "math", "science",
-            "programming", "technology", "politics", "news"
-        ]
-        
+        # Lowercase once and reuse for every category
         response_lower = response.lower()
         
         # Crisis intervention check
-        for keyword in crisis_keywords:
-            if keyword in response_lower:
-                return ("I'm very concerned about what you're sharing. Your life has value and there are people who want to help. "
-                       "Please reach out immediately to:\n"
-                       "• Crisis Text Line: Text HOME to 741741\n"
-                       "• National Suicide Prevention Lifeline: 988\n"
-                       "• Emergency Services: 911\n\n"
-                       "I'm here to support you emotionally, but please connect with professional crisis support right now. "
-                       "What immediate steps can we take to help you feel safer?")
+        if any(keyword in response_lower for keyword in CRISIS_KEYWORDS):
+            return _CRISIS_RESPONSE
         
         # Medical advice check
-        for keyword in medical_keywords:
-            if keyword in response_lower:
-                return ("I want to be helpful, but I can't provide medical advice or diagnoses. "
-                       "For medical concerns, please consult with a healthcare professional. "
-                       "I'm here to provide emotional support and help you process your feelings. "
-                       "How are you feeling emotionally about the situation you're facing?")
+        if any(keyword in response_lower for keyword in MEDICAL_KEYWORDS):
+            return _MEDICAL_RESPONSE
         
         # Off-topic redirect check  
-        for keyword in off_topic_keywords:
-            if keyword in response_lower:
-                return ("I'm here to provide psychological support and guidance. "
-                       "While I can't help with that topic, I'd be happy to talk about any emotions or stress "
-                       "you might be experiencing. What's on your mind regarding your emotional wellbeing?")
+        if any(keyword in response_lower for keyword in OFF_TOPIC_KEYWORDS):
+            return _OFF_TOPIC_RESPONSE
         
         # Psychology focus check
-        if not self._is_psychology_focused(response):
-            return ("I'm here to provide psychological support and emotional guidance. "
-                   "Let's focus on your thoughts, feelings, and emotional wellbeing. "
-                   "What would you like to explore about how you're feeling?")
+        if not any(keyword in response_lower for keyword in PSYCHOLOGY_KEYWORDS):
+            return _OFF_FOCUS_RESPONSE
         
         return response
-    
-    def _is_psychology_focused(self, response: str) -> bool:
-        """Check if response is focused on psychological topics."""
-        psychology_keywords = [
-            "feel", "emotion", "stress", "anxiety", "support", "coping", 
-            "mental health", "wellbeing", "thoughts", "mood", "therapy",
-            "counseling", "mindfulness", "self-care", "relationship"
-        ]
-        
-        response_lower = response.lower()
-        return any(keyword in response_lower for keyword in psychology_keywords)
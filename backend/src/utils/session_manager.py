@@ -2,9 +2,16 @@
 Session manager for maintaining conversation memory without database.
 """
 
-import uuid
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+import secrets
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional
+from datetime import datetime
+
+
+# Messages kept per session; older turns are evicted automatically
+MAX_STORED_MESSAGES = 64
 
 
 class ConversationSession:
@@ -13,8 +20,10 @@ class ConversationSession:
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.created_at = datetime.now()
-        self.last_activity = datetime.now()
-        self.messages: List[Dict[str, str]] = []
+        # Monotonic seconds, only used for expiry checks
+        self.last_activity = time.monotonic()
+        self.messages: Deque[Dict[str, str]] = deque(maxlen=MAX_STORED_MESSAGES)
+        self.prompt_lines: Deque[str] = deque(maxlen=MAX_STORED_MESSAGES)
         self.user_context: Dict[str, str] = {}
         
     def add_message(self, role: str, content: str):
@@ -24,11 +33,19 @@ class ConversationSession:
             "content": content,
             "timestamp": datetime.now().isoformat()
         })
-        self.last_activity = datetime.now()
+        # Render prompt line once so each LLM call only joins the tail
+        speaker = "Human" if role == "user" else "Assistant"
+        self.prompt_lines.append(f"{speaker}: {content}\n")
+        self.last_activity = time.monotonic()
     
     def get_conversation_history(self) -> List[Dict[str, str]]:
-        """Get full conversation history for LLM context."""
-        return self.messages
+        """Get stored conversation history (last MAX_STORED_MESSAGES msgs)."""
+        return list(self.messages)
+    
+    def get_prompt_context(self, max_messages: int = 10) -> str:
+        """Get last msgs pre-rendered as prompt lines for LLM context."""
+        start = max(0, len(self.prompt_lines) - max_messages)
+        return "".join(islice(self.prompt_lines, start, None))
     
     def update_context(self, key: str, value: str):
         """Update user context info (e.g., name, problem type)."""
@@ -36,18 +53,20 @@ class ConversationSession:
     
     def is_expired(self, max_age_hours: int = 24) -> bool:
         """Check if session is expired."""
-        return datetime.now() - self.last_activity > timedelta(hours=max_age_hours)
+        return time.monotonic() - self.last_activity > max_age_hours * 3600
 
 
 class SessionManager:
     """Manages multiple conversation sessions in memory."""
     
-    def __init__(self):
-        self.sessions: Dict[str, ConversationSession] = {}
+    def __init__(self, max_age_hours: int = 24):
+        # Ordered by last activity, least recently active first
+        self.sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+        self.max_age_hours = max_age_hours
     
     def create_session(self) -> str:
         """Create new conversation session and return session ID."""
-        session_id = str(uuid.uuid4())
+        session_id = secrets.token_urlsafe(16)
         self.sessions[session_id] = ConversationSession(session_id)
         return session_id
     
@@ -59,7 +78,9 @@ class SessionManager:
         """Get existing session or create new one."""
         if session_id and session_id in self.sessions:
             session = self.sessions[session_id]
-            if not session.is_expired():
+            if not session.is_expired(self.max_age_hours):
+                # Session is about to see activity, keep activity order
+                self.sessions.move_to_end(session_id)
                 return session
             else:
                 # Remove expired session
@@ -70,10 +91,14 @@ class SessionManager:
         return self.sessions[new_session_id]
     
     def cleanup_expired_sessions(self):
-        """Remove expired sessions to prevent memory leaks."""
-        expired_sessions = [
-            sid for sid, session in self.sessions.items() 
-            if session.is_expired()
-        ]
-        for sid in expired_sessions:
-            del self.sessions[sid]
+        """Remove expired sessions to prevent memory leaks.
+        
+        Sessions are kept in activity order, so only the expired ones at the
+        front are visited before the sweep stops.
+        """
+        cutoff = time.monotonic() - self.max_age_hours * 3600
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_activity >= cutoff:
+                break
+            self.sessions.popitem(last=False)
@@ -0,0 +1,14 @@
+"""
+Shared fixtures for backend tests.
+"""
+
+import pytest
+
+from src.utils.llm_handler import PsychologicalAdvisorLLM
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """LLM handler configured with a dummy key; no Gemini call is made."""
+    monkeypatch.setenv("API_KEY", "test-key")
+    return PsychologicalAdvisorLLM()
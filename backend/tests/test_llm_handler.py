@@ -0,0 +1,21 @@
+"""
+Tests for PsychologicalAdvisorLLM configuration.
+"""
+
+import pytest
+
+from src.utils.llm_handler import PsychologicalAdvisorLLM
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many"])
+def test_invalid_max_inflight_is_rejected(monkeypatch, value):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("LLM_MAX_INFLIGHT", value)
+    with pytest.raises(ValueError, match="LLM_MAX_INFLIGHT must be a positive integer"):
+        PsychologicalAdvisorLLM()
+
+
+def test_max_inflight_bounds_semaphore(monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("LLM_MAX_INFLIGHT", "3")
+    assert PsychologicalAdvisorLLM()._inflight._value == 3
@@ -0,0 +1,46 @@
+"""
+Tests for the psychological advisor response safety filter.
+"""
+
+from src.utils.llm_handler import (
+    _CRISIS_RESPONSE,
+    _MEDICAL_RESPONSE,
+    _OFF_FOCUS_RESPONSE,
+    _OFF_TOPIC_RESPONSE,
+)
+
+
+def test_crisis_takes_priority_over_other_categories(handler):
+    response = "Talk about the Weather and your MEDICATION, or End It All."
+    assert handler._apply_safety_filter(response) == _CRISIS_RESPONSE
+
+
+def test_medical_reply_is_replaced(handler):
+    response = "I feel a doctor could Prescribe something for that."
+    assert handler._apply_safety_filter(response) == _MEDICAL_RESPONSE
+
+
+def test_medical_takes_priority_over_off_topic(handler):
+    response = "I feel the weather affects your illness."
+    assert handler._apply_safety_filter(response) == _MEDICAL_RESPONSE
+
+
+def test_off_topic_reply_is_replaced(handler):
+    response = "How do you feel about the POLITICS in the news?"
+    assert handler._apply_safety_filter(response) == _OFF_TOPIC_RESPONSE
+
+
+def test_reply_without_psychology_keyword_is_redirected(handler):
+    response = "Take a breath and go for a walk."
+    assert handler._apply_safety_filter(response) == _OFF_FOCUS_RESPONSE
+
+
+def test_keyword_inside_a_word_still_matches(handler):
+    # Substring, not whole-word, matching: "feel" inside "Feelings" counts
+    response = "Feelings like these are worth exploring."
+    assert handler._apply_safety_filter(response) == response
+
+
+def test_psychology_focused_response_passes_through(handler):
+    response = "It sounds like STRESS has been building. How do you feel tonight?"
+    assert handler._apply_safety_filter(response) == response
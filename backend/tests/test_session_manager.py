@@ -0,0 +1,104 @@
+"""
+Tests for in-memory conversation sessions and their expiry.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import session_manager as session_module
+from src.utils.session_manager import (
+    MAX_STORED_MESSAGES,
+    ConversationSession,
+    SessionManager,
+)
+
+HOUR = 3600.0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable replacement for time.monotonic; advance via clock["now"]."""
+    state = {"now": 1_000_000.0}
+    # Swap the module's time reference only, so the real clock stays intact
+    monkeypatch.setattr(session_module, "time", SimpleNamespace(monotonic=lambda: state["now"]))
+    return state
+
+
+def test_sweep_pops_expired_front_and_stops_at_first_live(clock):
+    manager = SessionManager(max_age_hours=1)
+    old_a, old_b = manager.create_session(), manager.create_session()
+    clock["now"] += 2 * HOUR
+    live = manager.create_session()
+    # Expired but behind a live session, so the sweep must not reach it
+    straggler = manager.create_session()
+    manager.sessions[straggler].last_activity = clock["now"] - 2 * HOUR
+
+    manager.cleanup_expired_sessions()
+
+    assert old_a not in manager.sessions
+    assert old_b not in manager.sessions
+    assert list(manager.sessions) == [live, straggler]
+
+
+def test_sweep_keeps_everything_when_nothing_expired(clock):
+    manager = SessionManager(max_age_hours=1)
+    ids = [manager.create_session() for _ in range(3)]
+    clock["now"] += 0.5 * HOUR
+    manager.cleanup_expired_sessions()
+    assert list(manager.sessions) == ids
+
+
+def test_reused_session_moves_to_end(clock):
+    manager = SessionManager()
+    first, second = manager.create_session(), manager.create_session()
+
+    session = manager.get_or_create_session(first)
+
+    assert session.session_id == first
+    assert list(manager.sessions) == [second, first]
+
+
+def test_expired_session_is_replaced(clock):
+    manager = SessionManager(max_age_hours=1)
+    stale = manager.create_session()
+    clock["now"] += 2 * HOUR
+
+    session = manager.get_or_create_session(stale)
+
+    assert session.session_id != stale
+    assert stale not in manager.sessions
+    assert list(manager.sessions) == [session.session_id]
+
+
+def test_unknown_session_id_creates_new_session(clock):
+    manager = SessionManager()
+    session = manager.get_or_create_session("missing")
+    assert session.session_id != "missing"
+    assert session.session_id in manager.sessions
+
+
+def test_oldest_messages_are_evicted_at_maxlen():
+    session = ConversationSession("s")
+    for i in range(MAX_STORED_MESSAGES + 5):
+        session.add_message("user", f"m{i}")
+
+    history = session.get_conversation_history()
+    assert len(history) == MAX_STORED_MESSAGES
+    assert history[0]["content"] == "m5"
+    assert len(session.prompt_lines) == MAX_STORED_MESSAGES
+
+
+@pytest.mark.parametrize("count", [0, 3, 10, 11, MAX_STORED_MESSAGES + 7])
+def test_prompt_context_matches_last_ten_formatting(count):
+    session = ConversationSession("s")
+    for i in range(count):
+        session.add_message("user" if i % 2 == 0 else "assistant", f"message {i}")
+
+    # Formatting the prompt builder used before history was pre-rendered
+    expected = ""
+    for msg in list(session.messages)[-10:]:
+        role = "Human" if msg["role"] == "user" else "Assistant"
+        expected += f"{role}: {msg['content']}\n"
+
+    assert session.get_prompt_context(10) == expected
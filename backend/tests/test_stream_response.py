@@ -0,0 +1,130 @@
+"""
+Tests for streamed LLM responses and the streaming chat endpoint.
+"""
+
+from typing import List, Optional
+
+import pytest
+
+from src.api.chat import ChatRequest, stream_message
+from src.utils.llm_handler import (
+    _CRISIS_RESPONSE,
+    _FALLBACK_RESPONSE,
+    _MEDICAL_RESPONSE,
+    _OFF_TOPIC_RESPONSE,
+)
+from src.utils.session_manager import SessionManager
+
+
+class FakeChunk:
+    """Stand-in for a streamed Gemini response chunk."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    """Stand-in for GenerativeModel yielding fixed chunks, then optionally failing."""
+
+    def __init__(self, chunks: List[str], error: Optional[Exception] = None):
+        self.chunks = chunks
+        self.error = error
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        return self._stream()
+
+    async def _stream(self):
+        for text in self.chunks:
+            yield FakeChunk(text)
+        if self.error is not None:
+            raise self.error
+
+
+async def collect_events(handler, chunks, error=None):
+    handler.model = FakeModel(chunks, error)
+    return [event async for event in handler.stream_response("hello")]
+
+
+@pytest.mark.asyncio
+async def test_crisis_keyword_split_across_two_chunks_aborts(handler):
+    events = await collect_events(handler, ["You might feel ", "you want to ", "di", "e now"])
+    assert events[-1] == {"replace": _CRISIS_RESPONSE}
+    assert [e["delta"] for e in events[:-1]] == ["You might feel ", "you want to ", "di"]
+
+
+@pytest.mark.asyncio
+async def test_crisis_keyword_split_across_three_chunks_aborts(handler):
+    # Keyword starts two chunks back, so the re-scan must reach past the previous chunk
+    events = await collect_events(handler, ["I feel " * 10 + "better off ", "de", "ad today"])
+    assert events[-1] == {"replace": _CRISIS_RESPONSE}
+    assert sum("delta" in e for e in events) == 2
+
+
+@pytest.mark.asyncio
+async def test_medical_reply_ends_with_replace(handler):
+    events = await collect_events(handler, ["I feel this ", "medication may help."])
+    assert events == [
+        {"delta": "I feel this "},
+        {"delta": "medication may help."},
+        {"replace": _MEDICAL_RESPONSE},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_off_topic_reply_ends_with_replace(handler):
+    events = await collect_events(handler, ["Let's talk ", "about sports."])
+    assert events[-1] == {"replace": _OFF_TOPIC_RESPONSE}
+
+
+@pytest.mark.asyncio
+async def test_clean_reply_has_no_replace(handler):
+    events = await collect_events(handler, ["How do you ", "feel today?"])
+    assert events == [{"delta": "How do you "}, {"delta": "feel today?"}]
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_after_deltas_yields_fallback(handler):
+    events = await collect_events(handler, ["How do you "], error=RuntimeError("boom"))
+    assert events == [{"delta": "How do you "}, {"replace": _FALLBACK_RESPONSE}]
+
+
+async def open_stream(handler, chunks):
+    handler.model = FakeModel(chunks)
+    session_manager = SessionManager()
+    response = await stream_message(ChatRequest(message="hello"), session_manager, handler)
+    session = next(iter(session_manager.sessions.values()))
+    return response.body_iterator, session
+
+
+@pytest.mark.asyncio
+async def test_disconnect_before_any_delta_stores_nothing(handler):
+    body, session = await open_stream(handler, ["Take a breath"])
+    await body.__anext__()  # session_id event
+    await body.aclose()
+    assert [m["role"] for m in session.messages] == ["user"]
+
+
+@pytest.mark.asyncio
+async def test_disconnect_keeps_harmless_partial_text(handler):
+    body, session = await open_stream(handler, ["Take a breath", " and relax."])
+    await body.__anext__()
+    await body.__anext__()  # first delta
+    await body.aclose()
+    assert session.messages[-1]["content"] == "Take a breath"
+
+
+@pytest.mark.asyncio
+async def test_disconnect_filters_medical_partial_text(handler):
+    body, session = await open_stream(handler, ["This medication", " can help."])
+    await body.__anext__()
+    await body.__anext__()
+    await body.aclose()
+    assert session.messages[-1]["content"] == _MEDICAL_RESPONSE
+
+
+@pytest.mark.asyncio
+async def test_completed_stream_stores_filtered_reply(handler):
+    body, session = await open_stream(handler, ["Let's talk ", "about sports."])
+    events = [event async for event in body]
+    assert len(events) == 4
+    assert session.messages[-1]["content"] == _OFF_TOPIC_RESPONSE